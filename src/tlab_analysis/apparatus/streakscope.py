@@ -1,4 +1,4 @@
-import copy
+import dataclasses
 
 import numpy as np
 
@@ -48,10 +48,13 @@ def correct(data: trpl.TRPLData) -> trpl.TRPLData:
     >>> data is corrected
     False
     """
-    corrected_data = copy.deepcopy(data)
-    corrected_data.df["wavelength"] *= 4
-    corrected_data.df["intensity"] *= corrected_data.df["wavelength"].apply(
-        _correct_coefficient
+    wavelength_axis = data.wavelength_axis * 4
+    coefficient = np.array([_correct_coefficient(float(w)) for w in wavelength_axis])
+    corrected_data = dataclasses.replace(
+        data,
+        wavelength_axis=wavelength_axis,
+        intensity_2d=data.intensity_2d * coefficient,
+        metadata=list(data.metadata),
     )
     return corrected_data
 
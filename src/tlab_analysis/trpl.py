@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import dataclasses
+import functools
 import io
+import mmap
 import os
+import re
 import typing as t
 
 import numpy as np
@@ -27,17 +30,38 @@ DEFAULT_METADATA = [
     "Date:1970/01/01,00:00:00\n",
 ]
 
+# Layout of a raw binary from u8167
+_ENCODING = "UTF-8"
+_HEADER_SIZE = 64
+_NUM_METADATA_LINES = 4
+_SECTOR_SIZE = 1024
+_WAVELENGTH_RESOLUTION = 640
+_TIME_RESOLUTION = 480
+_NUM_SECTOR_INTENSITY = 600
+_NUM_SECTOR_WAVELENGTH = 4
+_NUM_SECTOR_TIME = 4
+_INTENSITY_SIZE = _SECTOR_SIZE * _NUM_SECTOR_INTENSITY
+_WAVELENGTH_SIZE = _SECTOR_SIZE * _NUM_SECTOR_WAVELENGTH
+_TIME_SIZE = _SECTOR_SIZE * _NUM_SECTOR_TIME
+_METADATA_PATTERN = re.compile(rb"(?:[^\n]*\n){%d}" % _NUM_METADATA_LINES)
+
 
 def read_file(
-    filepath_or_buffer: str | os.PathLike[str] | io.BufferedIOBase,
+    filepath_or_buffer: str
+    | os.PathLike[str]
+    | io.BufferedIOBase
+    | bytes
+    | bytearray
+    | memoryview,
 ) -> TRPLData:
     """
     Reads and parses a raw binary file generated by u8167 application.
 
     Parameters
     ----------
-    filepath_or_buffer : str | os.PathLike[str] | io.BufferedIOBase
-        The path to a raw binary or buffer from u8167.
+    filepath_or_buffer : str | os.PathLike[str] | io.BufferedIOBase | bytes-like
+        The path to a raw binary, buffer from u8167 or its contents.
+        The contents are parsed without copying.
 
     Returns
     -------
@@ -47,41 +71,90 @@ def read_file(
     Raises
     ------
     ValueError
-        If `filepath_or_buffer` is invalid.
+        If `filepath_or_buffer` is invalid, not contiguous
+        or its metadata is incomplete.
+
+    Notes
+    -----
+    The arrays of the returned data are not copied from the source.
+    A file is memory-mapped for as long as the data or any view of it lives,
+    so the file is locked against deletion or overwriting on Windows,
+    and truncating or rewriting it on POSIX changes the data or crashes
+    the process with SIGBUS. A bytes-like object shares its memory
+    with the data in the same way. Call `TRPLData.copy` on the returned data
+    if the source may change.
     """
     if isinstance(filepath_or_buffer, (str, os.PathLike)):
         with open(filepath_or_buffer, "rb") as f:
-            return _read_file(f)
+            # The arrays of the returned data share memory with the mapped file
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return _parse_raw_binary(buffer)
     elif isinstance(filepath_or_buffer, io.BufferedIOBase):
-        return _read_file(filepath_or_buffer)
+        return _parse_raw_binary(filepath_or_buffer.read())
+    elif isinstance(filepath_or_buffer, (bytes, bytearray, memoryview)):
+        view = memoryview(filepath_or_buffer)
+        if not view.c_contiguous:
+            raise ValueError("The buffer of the raw binary must be C-contiguous")
+        return _parse_raw_binary(view.cast("B"))
     else:
         raise ValueError(
             f"Invalid type for filepath_or_buffer: {type(filepath_or_buffer)}"
         )
 
 
-def _read_file(file: io.BufferedIOBase) -> TRPLData:
-    u8167 = TRPLData.u8167
-    header = file.read(64)
-    metadata = [file.readline().decode(u8167.encoding) for _ in range(4)]
-    intensity = np.frombuffer(file.read(u8167.sector_size * 600), dtype=np.uint16)
-    wavelength = np.frombuffer(file.read(u8167.sector_size * 4), dtype=np.float32)[
-        : u8167.wavelength_resolution
-    ]
-    time = np.frombuffer(file.read(u8167.sector_size * 4), dtype=np.float32)[
-        : u8167.time_resolution
-    ]
-    df = pd.DataFrame(
-        dict(
-            time=np.repeat(time, len(wavelength)),  # [ns]
-            wavelength=np.tile(wavelength, len(time)),  # [nm]
-            intensity=intensity,  # [arb. units]
-        )
+def _parse_raw_binary(buffer: bytes | memoryview | mmap.mmap) -> TRPLData:
+    header, offset = bytes(buffer[:_HEADER_SIZE]), _HEADER_SIZE
+    # Find the end of the metadata lines and decode them at once
+    match = _METADATA_PATTERN.match(buffer, offset)
+    if match is None:
+        raise ValueError("The metadata of the raw binary is incomplete")
+    end = match.end()
+    lines = str(buffer[offset:end], _ENCODING).split("\n")[:-1]
+    metadata = [line + "\n" for line in lines]
+    offset = end
+    intensity = np.frombuffer(
+        buffer,
+        dtype=np.uint16,
+        count=_TIME_RESOLUTION * _WAVELENGTH_RESOLUTION,
+        offset=offset,
+    )
+    offset += _INTENSITY_SIZE
+    wavelength = np.frombuffer(
+        buffer, dtype=np.float32, count=_WAVELENGTH_RESOLUTION, offset=offset
+    )
+    offset += _WAVELENGTH_SIZE
+    time = np.frombuffer(
+        buffer, dtype=np.float32, count=_TIME_RESOLUTION, offset=offset
+    )
+    data = TRPLData(
+        time,  # [ns]
+        wavelength,  # [nm]
+        intensity.reshape(len(time), len(wavelength)),  # [arb. units]
+        header,
+        metadata,
     )
-    data = TRPLData(df, header, metadata)
     return data
 
 
+def _range_to_slice(
+    axis: npt.NDArray[np.float32], value_range: tuple[float, float]
+) -> slice:
+    # `axis` is sorted, so the range is a contiguous slice
+    start = np.searchsorted(axis, value_range[0], side="left")
+    stop = np.searchsorted(axis, value_range[1], side="right")
+    return slice(int(start), int(stop))
+
+
+def _sum_intensity(intensity: npt.NDArray[t.Any], axis: int) -> npt.NDArray[t.Any]:
+    # Integer counts are accumulated in the narrowest type that cannot overflow
+    dtype = None
+    if np.issubdtype(intensity.dtype, np.integer):
+        max_sum = int(np.iinfo(intensity.dtype).max) * intensity.shape[axis]
+        dtype = np.int32 if max_sum <= np.iinfo(np.int32).max else np.int64
+    summed: npt.NDArray[t.Any] = intensity.sum(axis=axis, dtype=dtype)
+    return summed
+
+
 @dataclasses.dataclass(frozen=True)
 class TRPLData:
     """
@@ -89,22 +162,17 @@ class TRPLData:
 
     Examples
     --------
-    Create a dataframe of data.
+    Create the axes and the intensity of data.
     >>> time = np.linspace(0, 10, 3, dtype=np.float32)
     >>> wavelength = np.linspace(400, 500, 3, dtype=np.float32)
     >>> np.random.seed(0)
     >>> intensity = np.random.randint(
-    ...     0, 100, len(time) * len(wavelength), dtype=np.uint16)
-    >>> df = pd.DataFrame(
-    ...     dict(
-    ...         time=np.repeat(time, len(wavelength)),
-    ...         wavelength=np.tile(wavelength, len(time)),
-    ...         intensity=intensity,
-    ...     )
-    ... )
+    ...     0, 100, (len(time), len(wavelength)), dtype=np.uint16)
 
     Create a TRPLData object.
-    >>> data = TRPLData(df)
+    >>> data = TRPLData(time, wavelength, intensity)
+
+    Get the dataframe of data.
     >>> data.df
        time  wavelength  intensity
     0   0.0       400.0         44
@@ -174,10 +242,19 @@ class TRPLData:
     -----
     This class depends heavly on u8167 data structure.
     If you update your measurement system, this class can be deprecated.
+
+    The data is immutable. The arrays are stored as read-only views,
+    so that the cached `df` and aggregations always agree with them.
+    The arrays passed to the constructor must not be modified afterwards;
+    pass copies of them if they will be.
     """
 
-    df: pd.DataFrame
-    """A dataframe of the measurement data."""
+    time_axis: npt.NDArray[np.float32]
+    """A 1D array of time in nanosecond."""
+    wavelength_axis: npt.NDArray[np.float32]
+    """A 1D array of wavelength in nanometer."""
+    intensity_2d: npt.NDArray[t.Any]
+    """A 2D array of intensity in arbitrary units, shaped (time, wavelength)."""
     header: bytes = DEFAULT_HEADER
     """Bytes of the header of a raw binary from u8167."""
     metadata: list[str] = dataclasses.field(
@@ -187,58 +264,186 @@ class TRPLData:
 
     @dataclasses.dataclass(frozen=True)
     class u8167:
-        encoding: str = "UTF-8"
-        sector_size: int = 1024
-        wavelength_resolution: int = 640
-        time_resolution: int = 480
-        num_sector_intensity: int = 600
-        num_sector_wavelength: int = 4
-        num_sector_time: int = 4
+        encoding: str = _ENCODING
+        sector_size: int = _SECTOR_SIZE
+        wavelength_resolution: int = _WAVELENGTH_RESOLUTION
+        time_resolution: int = _TIME_RESOLUTION
+        num_sector_intensity: int = _NUM_SECTOR_INTENSITY
+        num_sector_wavelength: int = _NUM_SECTOR_WAVELENGTH
+        num_sector_time: int = _NUM_SECTOR_TIME
+
+    def __post_init__(self) -> None:
+        for name in ("time_axis", "wavelength_axis", "intensity_2d"):
+            view = getattr(self, name).view()
+            view.flags.writeable = False
+            object.__setattr__(self, name, view)
+        shape = (len(self.time_axis), len(self.wavelength_axis))
+        if 0 in shape:
+            raise ValueError(f"Both axes of data must not be empty: {shape}")
+        if self.intensity_2d.shape != shape:
+            raise ValueError(
+                f"The shape of `intensity_2d` must be {shape}: "
+                f"{self.intensity_2d.shape}"
+            )
 
     def __eq__(self, __o: object) -> bool:
         if isinstance(__o, TRPLData):
-            return all(
-                (
-                    (self.df == __o.df).all(axis=None),
-                    self.header == __o.header,
-                    self.metadata == __o.metadata,
-                )
+            # Compare the cheapest fields first to return early on a mismatch
+            return (
+                self.header == __o.header
+                and self.metadata == __o.metadata
+                and np.array_equal(self.time_axis, __o.time_axis)
+                and np.array_equal(self.wavelength_axis, __o.wavelength_axis)
+                and np.array_equal(self.intensity_2d, __o.intensity_2d)
             )
         else:
             return NotImplemented  # pragma: no cover
 
+    @classmethod
+    def from_dataframe(
+        cls,
+        df: pd.DataFrame,
+        header: bytes = DEFAULT_HEADER,
+        metadata: list[str] | None = None,
+    ) -> TRPLData:
+        """
+        Creates an object from a dataframe in the form of `TRPLData.df`.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            A dataframe with the columns of `time`, `wavelength` and `intensity`,
+            whose rows are sorted by time and then by wavelength on the grid.
+        header : bytes
+            Bytes of the header of a raw binary from u8167.
+        metadata : list[str] | None
+            Meta information of the data from u8167.
+            If None, the default metadata is used.
+
+        Returns
+        -------
+        tlab_analysis.trpl.TRPLData
+            A data object with the values of `df`.
+
+        Raises
+        ------
+        ValueError
+            If the rows of `df` do not form the grid of time and wavelength
+            or `df` is empty.
+
+        Examples
+        --------
+        >>> data = getfixture("trpl_data")
+        >>> TRPLData.from_dataframe(data.df, data.header, data.metadata) == data
+        True
+        """
+        time = df["time"].to_numpy()
+        wavelength = df["wavelength"].to_numpy()
+        time_axis, wavelength_axis = pd.unique(time), pd.unique(wavelength)
+        shape = len(time_axis), len(wavelength_axis)
+        if not (
+            len(df) == shape[0] * shape[1]
+            and (time.reshape(shape) == time_axis[:, np.newaxis]).all()
+            and (wavelength.reshape(shape) == wavelength_axis).all()
+        ):
+            raise ValueError("The rows of `df` must form a grid of time and wavelength")
+        return cls(
+            time_axis,
+            wavelength_axis,
+            df["intensity"].to_numpy(copy=True).reshape(shape),
+            header,
+            list(DEFAULT_METADATA) if metadata is None else list(metadata),
+        )
+
+    def copy(self) -> TRPLData:
+        """
+        Returns a copy whose arrays do not share memory with this data.
+
+        Returns
+        -------
+        tlab_analysis.trpl.TRPLData
+            A copy of the data independent of the source it was read from.
+        """
+        return dataclasses.replace(
+            self,
+            time_axis=self.time_axis.copy(),
+            wavelength_axis=self.wavelength_axis.copy(),
+            intensity_2d=self.intensity_2d.copy(),
+            metadata=list(self.metadata),
+        )
+
+    @functools.cached_property
+    def df(self) -> pd.DataFrame:
+        """
+        A dataframe of the measurement data.
+
+        It is derived from the arrays of data and cached on the first access.
+        Changes to the dataframe are not reflected to the other attributes
+        or methods; create a new object with `TRPLData.from_dataframe` instead.
+        """
+        # Fill both axis columns into one column-major block,
+        # which pandas adopts without copying or consolidating.
+        axes = np.empty(
+            (2, *self.intensity_2d.shape),
+            dtype=np.result_type(self.time_axis, self.wavelength_axis),
+        )
+        axes[0] = self.time_axis[:, np.newaxis]
+        axes[1] = self.wavelength_axis[np.newaxis, :]
+        df = pd.DataFrame(
+            axes.reshape(2, -1).T, columns=["time", "wavelength"], copy=False
+        )
+        df["intensity"] = self.intensity_2d.reshape(-1)
+        return df
+
+    @functools.cached_property
+    def _sorted_grid(
+        self,
+    ) -> tuple[npt.NDArray[np.float32], npt.NDArray[np.float32], npt.NDArray[t.Any]]:
+        # The axes and the image in ascending order of time and wavelength,
+        # which are views of data unless an axis is stored in another order
+        time, wavelength, intensity = (
+            self.time_axis,
+            self.wavelength_axis,
+            self.intensity_2d,
+        )
+        if np.any(np.diff(time) < 0):
+            order = np.argsort(time, kind="stable")
+            time, intensity = time[order], intensity[order]
+        if np.any(np.diff(wavelength) < 0):
+            order = np.argsort(wavelength, kind="stable")
+            wavelength, intensity = wavelength[order], intensity[:, order]
+        return time, wavelength, intensity
+
+    @functools.cached_property
+    def _scdc_cache(self) -> dict[tuple[float, float], tuple[float, float]]:
+        return dict()
+
+    def _grid_series(self, values: npt.NDArray[t.Any], name: str) -> pd.Series[float]:
+        # Broadcast onto the image grid and cast in a single allocation,
+        # so the series does not go through `df`.
+        grid = np.broadcast_to(values, self.intensity_2d.shape).astype(float)
+        return pd.Series(grid.reshape(-1), name=name, copy=False)
+
     @property
     def time(self) -> pd.Series[float]:
         """
         A series of time in nanosecond.
         """
-        column_name = "time"
-        assert (
-            column_name in self.df.columns
-        ), f"The column named `{column_name}` doesn't exist"
-        return self.df[column_name].astype(float)
+        return self._grid_series(self.time_axis[:, np.newaxis], "time")
 
     @property
     def wavelength(self) -> pd.Series[float]:
         """
         A series of wavelength in nanometer.
         """
-        column_name = "wavelength"
-        assert (
-            column_name in self.df.columns
-        ), f"The column named `{column_name}` doesn't exist"
-        return self.df[column_name].astype(float)
+        return self._grid_series(self.wavelength_axis[np.newaxis, :], "wavelength")
 
     @property
     def intensity(self) -> pd.Series[float]:
         """
         A series of intensity in arbitrary units.
         """
-        column_name = "intensity"
-        assert (
-            column_name in self.df.columns
-        ), f"The column named `{column_name}` doesn't exist"
-        return self.df[column_name].astype(float)
+        return self._grid_series(self.intensity_2d, "intensity")
 
     def to_streak_image(self) -> npt.NDArray[np.float64]:
         """
@@ -269,11 +474,8 @@ class TRPLData:
                [22., 64., 33.],
                [67., 78., 34.]])
         """
-        img = (
-            self.df.sort_values(["time", "wavelength"])["intensity"]
-            .to_numpy(dtype=np.float64)
-            .reshape(len(self.time.unique()), len(self.wavelength.unique()))
-        )
+        # Always copy into a C-ordered array not to expose the data itself
+        img = np.array(self._sorted_grid[2], dtype=np.float64, order="C")
         return img
 
     def to_raw_binary(self) -> bytes:
@@ -285,26 +487,29 @@ class TRPLData:
         bytes
             A raw binary that u8167 can operate.
         """
-        u8167 = self.u8167()
-        intensity_size = u8167.sector_size * u8167.num_sector_intensity
-        wavelength_size = u8167.sector_size * u8167.num_sector_wavelength
-        time_size = u8167.sector_size * u8167.num_sector_time
-        raw_binary = (
-            self.header
-            + "".join(self.metadata).encode(u8167.encoding)
-            + self.intensity.to_numpy(np.uint16)
-            .tobytes("C")
-            .ljust(intensity_size, b"\x00")[:intensity_size]
-            + self.wavelength.unique()
-            .astype(np.float32)
-            .tobytes("C")
-            .ljust(wavelength_size, b"\x00")[:wavelength_size]
-            + self.time.unique()
-            .astype(np.float32)
-            .tobytes("C")
-            .ljust(time_size, b"\x00")[:time_size]
+        head = self.header + "".join(self.metadata).encode(_ENCODING)
+        # Sections are zero-padded by the initialization of the buffer
+        raw_binary = bytearray(
+            len(head) + _INTENSITY_SIZE + _WAVELENGTH_SIZE + _TIME_SIZE
         )
-        return raw_binary
+        raw_binary[: len(head)] = head
+        offset = len(head)
+        for array, dtype, size in (
+            (self.intensity_2d, np.uint16, _INTENSITY_SIZE),
+            (self.wavelength_axis, np.float32, _WAVELENGTH_SIZE),
+            (self.time_axis, np.float32, _TIME_SIZE),
+        ):
+            # Cast and copy the values directly into a view of the buffer
+            section = np.frombuffer(
+                raw_binary,
+                dtype=dtype,
+                count=size // np.dtype(dtype).itemsize,
+                offset=offset,
+            )
+            values = array.reshape(-1)[: section.size]
+            section[: values.size] = values
+            offset += size
+        return bytes(raw_binary)
 
     def aggregate_along_time(
         self, time_range: tuple[float, float] | None = None
@@ -344,15 +549,17 @@ class TRPLData:
         1       300.0        189
         2       400.0        135
         """
+        time, wavelength, intensity_2d = self._sorted_grid
         if time_range is None:
-            time_range = self.time.min(), self.time.max()
-        df = (
-            self.df[self.time.between(*time_range)]
-            .groupby("wavelength")
-            .sum()
-            .drop("time", axis=1)
-            .sort_values("wavelength")
-            .reset_index()
+            time_range = float(time[0]), float(time[-1])
+        rows = _range_to_slice(time, time_range)
+        intensity = _sum_intensity(intensity_2d[rows], axis=0)
+        if rows.start >= rows.stop:  # No data is in the range
+            wavelength, intensity = wavelength[:0], intensity[:0]
+        # The summed intensity is a fresh array and can be adopted as is,
+        # while the axis is copied not to share memory with this data.
+        df = pd.DataFrame(
+            dict(wavelength=wavelength.copy(), intensity=intensity), copy=False
         )
         df.attrs.update(time_range=time_range)
         return df
@@ -404,21 +611,23 @@ class TRPLData:
         1   5.0        119
         2  10.0        179
         """
+        time, wavelength, intensity_2d = self._sorted_grid
         if wavelength_range is None:
-            wavelength_range = self.wavelength.min(), self.wavelength.max()
-        df = (
-            self.df[self.wavelength.between(*wavelength_range)]
-            .groupby("time")
-            .sum()
-            .drop("wavelength", axis=1)
-            .sort_values("time")
-            .reset_index()
-        )
+            wavelength_range = float(wavelength[0]), float(wavelength[-1])
+        columns = _range_to_slice(wavelength, wavelength_range)
+        intensity = _sum_intensity(intensity_2d[:, columns], axis=1)
+        if columns.start >= columns.stop:  # No data is in the range
+            time, intensity = time[:0], intensity[:0]
+        df = pd.DataFrame(dict(time=time.copy(), intensity=intensity), copy=False)
         if time_offset == "auto" or intensity_offset == "auto":
-            scdc = utils.find_scdc(
-                df["time"].to_list(),
-                df["intensity"].to_list(),
-            )
+            # The SCDC depends only on the range, so it is computed once per range
+            key = float(wavelength_range[0]), float(wavelength_range[1])
+            if key not in self._scdc_cache:
+                self._scdc_cache[key] = utils.find_scdc(
+                    df["time"].to_numpy(),
+                    df["intensity"].to_numpy(),
+                )
+            scdc = self._scdc_cache[key]
             time_offset = scdc[0] if time_offset == "auto" else time_offset
             intensity_offset = (
                 scdc[1] if intensity_offset == "auto" else intensity_offset
@@ -2,11 +2,12 @@ from __future__ import annotations
 
 import bisect
 import dataclasses
+import functools
 import typing as t
 from collections import abc
 
 import numpy as np
-import pandas as pd
+import numpy.typing as npt
 from scipy import interpolate, optimize, signal
 
 
@@ -40,6 +41,49 @@ def validate_xdata_and_ydata(
         raise ValueError("`xdata` and `ydata` must not be empty")
 
 
+def _asarray(data: abc.Collection[float]) -> npt.NDArray[np.float64]:
+    return np.ascontiguousarray(data, dtype=np.float64)
+
+
+# Only the inputs up to this size are memoized, which bounds the memory
+# held by the cache to about ten megabytes
+_SPLINE_CACHE_MAX_SIZE = 10_000
+
+
+def _eval_smoothing_spline(
+    xdata: abc.Collection[float], ydata: abc.Collection[float], spline_size: int
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    _xdata, _ydata = _asarray(xdata), _asarray(ydata)
+    if _xdata.size > _SPLINE_CACHE_MAX_SIZE or spline_size > _SPLINE_CACHE_MAX_SIZE:
+        return _fit_smoothing_spline(_xdata, _ydata, spline_size)
+    # Spline fits are shared by content between find_peaks, curve_fit, etc.
+    return _eval_smoothing_spline_cached(
+        _xdata.tobytes(), _ydata.tobytes(), spline_size
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def _eval_smoothing_spline_cached(
+    xdata: bytes, ydata: bytes, spline_size: int
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    x, y = _fit_smoothing_spline(
+        np.frombuffer(xdata), np.frombuffer(ydata), spline_size
+    )
+    # The cached arrays are shared, so they must not be modified
+    x.setflags(write=False)
+    y.setflags(write=False)
+    return x, y
+
+
+def _fit_smoothing_spline(
+    xdata: npt.NDArray[np.float64], ydata: npt.NDArray[np.float64], spline_size: int
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    spl = interpolate.make_smoothing_spline(xdata, ydata)
+    x = np.linspace(xdata.min(), xdata.max(), spline_size)
+    y = spl(x)
+    return x, y
+
+
 def smooth(x: abc.Collection[float], window: int | float = 3) -> list[float]:
     """
     Smooths an array by mean filtering.
@@ -74,9 +118,18 @@ def smooth(x: abc.Collection[float], window: int | float = 3) -> list[float]:
         _window = int(len(x) * window)
     else:
         _window = int(window)
-    return (
-        pd.Series(list(x)).rolling(_window, center=True, min_periods=1).mean().to_list()
-    )
+    _x = _asarray(x)
+    if _x.size == 0:
+        return list()
+    # Centered moving average truncated at both ends, skipping NaNs
+    kernel = np.ones(_window)
+    start = _window - 1 - _window // 2
+    valid = ~np.isnan(_x)
+    sums = np.convolve(np.where(valid, _x, 0.0), kernel)[start : start + _x.size]
+    counts = np.convolve(valid, kernel)[start : start + _x.size]
+    with np.errstate(invalid="ignore"):  # A window of only NaNs gives NaN
+        smoothed: list[float] = (sums / counts).tolist()
+    return smoothed
 
 
 @dataclasses.dataclass(frozen=True)
@@ -148,9 +201,7 @@ def find_peaks(
     [Peak(x=-0.002002002002001957, y=0.9999676167328615)]
     """
     # Create a B-spline curve
-    spl = interpolate.make_smoothing_spline(xdata, ydata)
-    x = np.linspace(min(xdata), max(xdata), spline_size)
-    y = spl(x)
+    x, y = _eval_smoothing_spline(xdata, ydata, spline_size)
     # Extract peaks from the B-spline curve
     peaks, props = signal.find_peaks(y, width=width, **kwargs)
     # Create a list of Peak objects
@@ -206,7 +257,7 @@ def find_decay_range(
     >>> find_decay_range(x, low=0.2)
     (4, 8)
     """
-    _x = np.array(x)
+    _x = _asarray(x)
     max_index = _x.argmax()
     max_x = _x.max()
     left = (
@@ -218,6 +269,21 @@ def find_decay_range(
     return int(left), int(right)
 
 
+def _trailing_mean_and_std(
+    y: npt.NDArray[np.float64], window: int
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    # Moving mean and sample std of the last `window` points, NaN until filled.
+    # The deviations reuse the mean instead of recomputing it as `std` does.
+    mean = np.full(y.size, np.nan)
+    std = np.full(y.size, np.nan)
+    if y.size >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(y, window)
+        mean[window - 1 :] = windows.mean(axis=1)
+        deviations = windows - mean[window - 1 :, np.newaxis]
+        std[window - 1 :] = np.sqrt(np.square(deviations).sum(axis=1) / (window - 1))
+    return mean, std
+
+
 def find_scdc(  # SCDC: the Start Coordinates of a Decay Curve
     xdata: abc.Collection[float],
     ydata: abc.Collection[float],
@@ -240,6 +306,11 @@ def find_scdc(  # SCDC: the Start Coordinates of a Decay Curve
     tuple[float, float]
         Coordinates of a start point of rising curve: (x, y).
 
+    Raises
+    ------
+    ValueError
+        If no decay curve is found in the data.
+
     Examples
     --------
     >>> x = np.linspace(-5, 5, 1000)
@@ -255,22 +326,24 @@ def find_scdc(  # SCDC: the Start Coordinates of a Decay Curve
     https://github.com/wasedatakeuchilab/tlab-analysis/blob/master/resources/images/utils/find_scdc.svg
     """
     validate_xdata_and_ydata(xdata, ydata)
+    x, y = _asarray(xdata), _asarray(ydata)
     # Determine a range of the background signal
     window, k = _window, _k
-    df = pd.DataFrame(dict(x=xdata, y=ydata))
-    rolling = df["y"].rolling(window)
-    sup_noise = rolling.mean().to_numpy() + k * rolling.std().to_numpy()
-    background = df["y"][
-        df["x"].le(df["x"][df["y"].gt(sup_noise).shift(-1, fill_value=False)].min())
-    ]
-    baseline = background[
-        background.between(background.quantile(0.05), background.quantile(0.95))
-    ].mean()
+    mean, std = _trailing_mean_and_std(y, window)
+    sup_noise = mean + k * std
+    is_signal = y[1:] > sup_noise[1:]
+    if not is_signal.any():
+        raise ValueError("No signal rises above the background noise")
+    background = y[x <= x[is_signal.argmax()]]
+    lower, upper = np.quantile(background, [0.05, 0.95])
+    baseline = background[(lower <= background) & (background <= upper)].mean()
     # Determine (x, y) coordinates of a start point
-    index = np.arange(len(xdata))[
-        (df.index < df["y"].argmax()) & (df["y"] < baseline)
-    ].max()
-    return (float(df["x"][index]), float(df["y"][index]))
+    peak = int(y.argmax())
+    is_below = y[:peak][::-1] < baseline
+    if not is_below.any():
+        raise ValueError("No point before the peak is below the baseline")
+    index = peak - 1 - int(is_below.argmax())
+    return (float(x[index]), float(y[index]))
 
 
 def determine_fit_range_dc(
@@ -322,15 +395,12 @@ def determine_fit_range_dc(
     )
     validate_xdata_and_ydata(xdata, ydata)
     # Create a B-Spline curve
-    spl = interpolate.make_smoothing_spline(xdata, ydata)
-    _x = np.linspace(min(xdata), max(xdata), spline_size)
-    _y = spl(_x)
+    _x, _y = _eval_smoothing_spline(xdata, ydata, spline_size)
     # Find the fitting range
-    df = pd.DataFrame(dict(x=_x, y=_y))
-    left = df["x"][int(df["y"].shift(2).argmax())]
-    right = df["x"][
-        (df.index > df["y"].argmax()) & (df["y"].ge(_decay_ratio * df["y"].max()))
-    ].max()
+    peak = int(_y.argmax())
+    left = _x[int(_y[:-2].argmax()) + 2]
+    (decay,) = np.nonzero(_y[peak + 1 :] >= _decay_ratio * _y[peak])
+    right = _x[peak + 1 + decay[-1]] if decay.size > 0 else np.nan
     return float(left), float(right)
 
 
@@ -386,9 +456,7 @@ def curve_fit(
     """
     validate_xdata_and_ydata(xdata, ydata)
     # Create a B-Spline curve
-    spl = interpolate.make_smoothing_spline(xdata, ydata)
-    _x = np.linspace(min(xdata), max(xdata), spline_size)
-    _y = spl(_x)
+    _x, _y = _eval_smoothing_spline(xdata, ydata, spline_size)
     return optimize.curve_fit(
         func,
         xdata=_x,
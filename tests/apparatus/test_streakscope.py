@@ -12,19 +12,13 @@ TIME_RESOLUTION = 480
 
 @pytest.fixture(params=[0, 1, 2])
 def data(request: FixtureRequest[int]) -> trpl.TRPLData:
-    random = np.random.RandomState(request.param)
+    random = np.random.default_rng(request.param)
     time = np.linspace(0, 10, TIME_RESOLUTION, dtype=np.float32)
     wavelength = np.linspace(200, 400, WAVELENGTH_RESOLUTION, dtype=np.float32)
-    df = pd.DataFrame(
-        dict(
-            time=np.repeat(time, len(wavelength)),
-            wavelength=np.tile(wavelength, len(time)),
-            intensity=random.randint(
-                0, 100, WAVELENGTH_RESOLUTION * TIME_RESOLUTION, dtype=np.uint16
-            ),
-        )
+    intensity = random.integers(
+        0, 100, (TIME_RESOLUTION, WAVELENGTH_RESOLUTION), dtype=np.uint16
     )
-    data = trpl.TRPLData(df)
+    data = trpl.TRPLData(time, wavelength, intensity)
     return data
 
 
@@ -34,3 +28,9 @@ def test_correct(data: trpl.TRPLData) -> None:
     pd.testing.assert_series_equal(
         corrected.df["wavelength"], data.df["wavelength"] * 4
     )
+    pd.testing.assert_series_equal(
+        corrected.df["intensity"],
+        data.df["intensity"]
+        * corrected.df["wavelength"].apply(streakscope._correct_coefficient),
+        check_names=False,
+    )
@@ -21,5 +21,4 @@ def filepath(
 
 @pytest.fixture()
 def write_raw_binary(filepath: os.PathLike[str], raw_binary: bytes) -> None:
-    with open(filepath, "wb") as f:
-        f.write(raw_binary)
+    pathlib.Path(filepath).write_bytes(raw_binary)
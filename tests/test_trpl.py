@@ -1,79 +1,111 @@
+import dataclasses
 import io
+import itertools
 import os
 import typing as t
 
 import numpy as np
+import numpy.typing as npt
 import pandas as pd
 import pytest
 import pytest_mock
 
 from tests import FixtureRequest
-from tlab_analysis import trpl
+from tlab_analysis import trpl, utils
 
 WAVELENGTH_RESOLUTION = 640
 TIME_RESOLUTION = 480
+HEADER = bytes.fromhex(
+    "49 4d cd 01 80 02 e0 01 00 00 00 00 02 00 00 00"
+    "00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00"
+    "00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00"
+    "00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00"
+)
+METADATA = [
+    "HiPic,1.0,100,1.0,0,0,4,8,0,0,0,01-01-1970,00:00:00,"
+    "0,0,0,0,0, , , , ,0,0,0,0,0, , ,0,, , , ,0,0,, ,0,0,0,0,0,0,0,0,0,0,2,"
+    "1,nm,*0614925,2,1,ns,*0619021,0,0,0,0,0,0,0,0,0,2,0,0,0,0,0.0,0,0,"
+    "StopCondition:PhotonCounting, Frame=10000, Time=300.0[sec], CountingRate=0.10[%]\n",  # noqa: E501
+    "Streak:Time=10 ns, Mode=Operate, Shutter=0, MCPGain=10, MCPSwitch=1,\n",
+    "Spectrograph:Wavelength=490.000[nm], Grating=2 : 150g/mm, SlitWidthIn=100[um], Mode=Spectrograph\n",  # noqa: E501
+    "Date:1970/01/01,00:00:00\n",
+]
+METADATA_BYTES = "".join(METADATA).encode(trpl.TRPLData.u8167.encoding)
 
 
-@pytest.fixture(params=[0, 1, 2])
-def data(request: FixtureRequest[int]) -> trpl.TRPLData:
-    random = np.random.RandomState(request.param)
-    header = bytes.fromhex(
-        "49 4d cd 01 80 02 e0 01 00 00 00 00 02 00 00 00"
-        "00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00"
-        "00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00"
-        "00 00 00 00 00 00 00 00 00 00 00 00 00 00 00 00"
-    )
-    metadata = [
-        "HiPic,1.0,100,1.0,0,0,4,8,0,0,0,01-01-1970,00:00:00,"
-        "0,0,0,0,0, , , , ,0,0,0,0,0, , ,0,, , , ,0,0,, ,0,0,0,0,0,0,0,0,0,0,2,"
-        "1,nm,*0614925,2,1,ns,*0619021,0,0,0,0,0,0,0,0,0,2,0,0,0,0,0.0,0,0,"
-        "StopCondition:PhotonCounting, Frame=10000, Time=300.0[sec], CountingRate=0.10[%]\n",  # noqa: E501
-        "Streak:Time=10 ns, Mode=Operate, Shutter=0, MCPGain=10, MCPSwitch=1,\n",
-        "Spectrograph:Wavelength=490.000[nm], Grating=2 : 150g/mm, SlitWidthIn=100[um], Mode=Spectrograph\n",  # noqa: E501
-        "Date:1970/01/01,00:00:00\n",
-    ]
-    time = np.linspace(
-        0,
-        [2, 5, 10][request.param],
-        TIME_RESOLUTION,
-        dtype=np.float32,
-    )
-    wavelength = np.linspace(
-        *([(200, 400), (300, 600), (200, 600)][request.param]),
-        WAVELENGTH_RESOLUTION,
-        dtype=np.float32,
-    )
-    df = pd.DataFrame(
-        dict(
-            time=np.repeat(time, len(wavelength)),
-            wavelength=np.tile(wavelength, len(time)),
-            intensity=random.randint(
-                0, 100, WAVELENGTH_RESOLUTION * TIME_RESOLUTION, dtype=np.uint16
-            ),
+def _read_only(array: npt.NDArray[np.float32]) -> npt.NDArray[np.float32]:
+    array.setflags(write=False)
+    return array
+
+
+# The axes for each `data` param, shared by all the tests that use them
+TIME_AXES = tuple(
+    _read_only(np.linspace(0, stop, TIME_RESOLUTION, dtype=np.float32))
+    for stop in (2, 5, 10)
+)
+WAVELENGTH_AXES = tuple(
+    _read_only(np.linspace(start, stop, WAVELENGTH_RESOLUTION, dtype=np.float32))
+    for start, stop in ((200, 400), (300, 600), (200, 600))
+)
+
+
+def assert_frame_values_equal(actual: pd.DataFrame, expected: pd.DataFrame) -> None:
+    assert actual.columns.equals(expected.columns)
+    assert actual.index.equals(expected.index)
+    for column in expected.columns:
+        np.testing.assert_array_equal(
+            actual[column].to_numpy(), expected[column].to_numpy(), strict=True
         )
+
+
+@pytest.fixture(scope="session", params=[0, 1, 2])
+def session_data(request: FixtureRequest[int]) -> trpl.TRPLData:
+    random = np.random.default_rng(request.param)
+    time = TIME_AXES[request.param]
+    wavelength = WAVELENGTH_AXES[request.param]
+    intensity = random.integers(
+        0, 100, (TIME_RESOLUTION, WAVELENGTH_RESOLUTION), dtype=np.uint16
     )
-    data = trpl.TRPLData(df, header, metadata)
+    intensity.setflags(write=False)
+    data = trpl.TRPLData(time, wavelength, intensity, HEADER, list(METADATA))
     return data
 
 
 @pytest.fixture()
-def raw_binary(data: trpl.TRPLData) -> bytes:
+def data(session_data: trpl.TRPLData) -> trpl.TRPLData:
+    # A fresh instance sharing the read-only arrays,
+    # so that the cached `df` and SCDCs don't leak between tests
+    return dataclasses.replace(session_data, metadata=list(session_data.metadata))
+
+
+@pytest.fixture(scope="session")
+def raw_binary(session_data: trpl.TRPLData) -> bytes:
+    data = session_data
     u8167 = trpl.TRPLData.u8167
-    return (
-        data.header
-        + "".join(data.metadata).encode(u8167.encoding)
-        + data.intensity.to_numpy(dtype=np.uint16)
-        .tobytes("C")
-        .ljust(u8167.sector_size * u8167.num_sector_intensity, b"\x00")
-        + data.wavelength.unique()
-        .astype(np.float32)
-        .tobytes("C")
-        .ljust(u8167.sector_size * u8167.num_sector_wavelength, b"\x00")
-        + data.time.unique()
-        .astype(np.float32)
-        .tobytes("C")
-        .ljust(u8167.sector_size * u8167.num_sector_time, b"\x00")
+    head = HEADER + METADATA_BYTES
+    sections = (
+        (
+            data.intensity_2d.astype(np.uint16),
+            u8167.sector_size * u8167.num_sector_intensity,
+        ),
+        (
+            data.wavelength_axis.astype(np.float32),
+            u8167.sector_size * u8167.num_sector_wavelength,
+        ),
+        (
+            data.time_axis.astype(np.float32),
+            u8167.sector_size * u8167.num_sector_time,
+        ),
     )
+    # Padding of each section is left as zeros from the initialization
+    buffer = bytearray(len(head) + sum(size for _, size in sections))
+    view = memoryview(buffer)
+    view[: len(head)] = head
+    offset = len(head)
+    for array, size in sections:
+        view[offset : offset + array.nbytes] = array.tobytes("C")
+        offset += size
+    return bytes(buffer)
 
 
 @pytest.mark.parametrize("filename", ["trpl_testcase.img"])
@@ -91,12 +123,115 @@ def test_read_file_from_buffer(raw_binary: bytes, data: trpl.TRPLData) -> None:
     assert actual == data
 
 
+@pytest.mark.parametrize("convert", [bytes, bytearray, memoryview])
+def test_read_file_from_bytes_like(
+    raw_binary: bytes,
+    data: trpl.TRPLData,
+    convert: t.Callable[[bytes], bytes | bytearray | memoryview],
+) -> None:
+    actual = trpl.read_file(convert(raw_binary))
+    assert actual == data
+
+
+def test_read_file_non_contiguous_buffer(raw_binary: bytes) -> None:
+    with pytest.raises(ValueError):
+        trpl.read_file(memoryview(raw_binary)[::2])
+
+
+def test_read_file_incomplete_metadata(raw_binary: bytes) -> None:
+    with io.BytesIO(raw_binary[:100]) as f:
+        with pytest.raises(ValueError):
+            trpl.read_file(f)
+
+
+@pytest.mark.fast
 def test_read_file_invalid_type() -> None:
     with pytest.raises(ValueError):
         trpl.read_file(None)  # type: ignore
 
 
 def describe_trpl_data() -> None:
+    def test_invalid_shape(data: trpl.TRPLData) -> None:
+        with pytest.raises(ValueError):
+            trpl.TRPLData(data.time_axis, data.wavelength_axis, data.intensity_2d.T)
+
+    def test_empty_axis(data: trpl.TRPLData) -> None:
+        with pytest.raises(ValueError):
+            dataclasses.replace(
+                data, time_axis=data.time_axis[:0], intensity_2d=data.intensity_2d[:0]
+            )
+        with pytest.raises(ValueError):
+            trpl.TRPLData.from_dataframe(data.df.iloc[:0])
+
+    def test_descending_axes(data: trpl.TRPLData) -> None:
+        descending = dataclasses.replace(
+            data,
+            time_axis=data.time_axis[::-1],
+            wavelength_axis=data.wavelength_axis[::-1],
+            intensity_2d=data.intensity_2d[::-1, ::-1],
+        )
+        raw_binary = descending.to_raw_binary()
+        actual = trpl.read_file(raw_binary)
+        assert actual == descending
+        assert actual.to_raw_binary() == raw_binary
+        np.testing.assert_array_equal(actual.to_streak_image(), data.to_streak_image())
+        assert_frame_values_equal(
+            actual.aggregate_along_time(), data.aggregate_along_time()
+        )
+        assert_frame_values_equal(
+            actual.aggregate_along_wavelength(time_offset=0, intensity_offset=0),
+            data.aggregate_along_wavelength(time_offset=0, intensity_offset=0),
+        )
+
+    def test_eq(data: trpl.TRPLData) -> None:
+        assert data == dataclasses.replace(data)
+        assert data != dataclasses.replace(data, intensity_2d=data.intensity_2d + 1)
+        assert data != dataclasses.replace(data, time_axis=data.time_axis + 1)
+        assert data != dataclasses.replace(
+            data, wavelength_axis=data.wavelength_axis + 1
+        )
+        assert data != dataclasses.replace(data, header=bytes(64))
+        assert data != dataclasses.replace(data, metadata=data.metadata[:-1])
+
+    def test_from_dataframe(data: trpl.TRPLData) -> None:
+        actual = trpl.TRPLData.from_dataframe(data.df, data.header, data.metadata)
+        assert actual == data
+        assert trpl.TRPLData.from_dataframe(data.df).metadata == trpl.DEFAULT_METADATA
+
+    def test_from_dataframe_not_on_grid(data: trpl.TRPLData) -> None:
+        with pytest.raises(ValueError):
+            trpl.TRPLData.from_dataframe(data.df.iloc[:-1])
+        with pytest.raises(ValueError):
+            trpl.TRPLData.from_dataframe(data.df.take(np.r_[1, 0, 2 : len(data.df)]))
+
+    def test_arrays_are_read_only(data: trpl.TRPLData) -> None:
+        expected = data.aggregate_along_wavelength()
+        for name in ("time_axis", "wavelength_axis", "intensity_2d"):
+            with pytest.raises(ValueError):
+                getattr(data, name)[:] = 0
+        with pytest.raises(ValueError):
+            data.copy().intensity_2d[:] += 100
+        assert_frame_values_equal(data.aggregate_along_wavelength(), expected)
+        assert_frame_values_equal(data.copy().aggregate_along_wavelength(), expected)
+
+    def test_copy(data: trpl.TRPLData) -> None:
+        copied = data.copy()
+        assert copied == data
+        for name in ("time_axis", "wavelength_axis", "intensity_2d"):
+            array = getattr(copied, name)
+            assert not np.shares_memory(array, getattr(data, name))
+        assert copied.metadata is not data.metadata
+
+    def test_df(data: trpl.TRPLData) -> None:
+        expected = pd.DataFrame(
+            dict(
+                time=np.repeat(data.time_axis, len(data.wavelength_axis)),
+                wavelength=np.tile(data.wavelength_axis, len(data.time_axis)),
+                intensity=data.intensity_2d.reshape(-1),
+            )
+        )
+        pd.testing.assert_frame_equal(data.df, expected)
+
     def test_time(data: trpl.TRPLData) -> None:
         pd.testing.assert_series_equal(data.time, data.df["time"].astype(float))
 
@@ -113,67 +248,131 @@ def describe_trpl_data() -> None:
     def test_to_streak_image(data: trpl.TRPLData) -> None:
         img = data.to_streak_image()
         assert img.shape == (TIME_RESOLUTION, WAVELENGTH_RESOLUTION)
-        assert np.all(
-            img
-            == data.intensity.to_numpy(np.float32).reshape(
-                TIME_RESOLUTION, WAVELENGTH_RESOLUTION
-            ),
+        np.testing.assert_array_equal(img, data.intensity_2d.astype(np.float64))
+
+    def test_to_streak_image_is_c_contiguous(data: trpl.TRPLData) -> None:
+        data = dataclasses.replace(
+            data, intensity_2d=np.asfortranarray(data.intensity_2d)
         )
+        img = data.to_streak_image()
+        assert img.flags.c_contiguous
+        np.testing.assert_array_equal(img, data.intensity_2d.astype(np.float64))
+
+    def test_to_streak_image_returns_copy(data: trpl.TRPLData) -> None:
+        data = dataclasses.replace(
+            data, intensity_2d=data.intensity_2d.astype(np.float64)
+        )
+        expected = data.aggregate_along_time()
+        img = data.to_streak_image()
+        img -= 1e6
+        assert not np.shares_memory(img, data.intensity_2d)
+        assert_frame_values_equal(data.aggregate_along_time(), expected)
 
     def test_to_raw_binary(data: trpl.TRPLData, raw_binary: bytes) -> None:
         assert data.to_raw_binary() == raw_binary
 
-    @pytest.mark.parametrize("time_range", [None, (0.0, 1.0)])
+    @pytest.mark.parametrize("time_range", [None, (0.0, 1.0), (-2.0, -1.0)])
     def test_aggregate_along_time(
         data: trpl.TRPLData, time_range: tuple[float, float] | None
     ) -> None:
         actual = data.aggregate_along_time(time_range)
         if time_range is None:
             time_range = data.time.min(), data.time.max()
-        expected = (
-            data.df[data.time.between(*time_range)]
-            .groupby("wavelength")
-            .sum()
-            .drop("time", axis=1)
-            .sort_values("wavelength")
-            .reset_index()
-        )
+        rows = (time_range[0] <= data.time_axis) & (data.time_axis <= time_range[1])
+        expected = pd.DataFrame(
+            dict(
+                wavelength=data.wavelength_axis,
+                intensity=data.intensity_2d[rows].sum(axis=0, dtype=np.int32),
+            )
+        ).iloc[: len(data.wavelength_axis) if rows.any() else 0]
         assert actual.attrs["time_range"] == time_range
-        pd.testing.assert_frame_equal(actual, expected)
+        assert_frame_values_equal(actual, expected)
+
+    @pytest.fixture()
+    def find_scdc_mock(mocker: pytest_mock.MockerFixture) -> pytest_mock.MockType:
+        return mocker.patch.object(utils, "find_scdc", return_value=(0.0, 0.0))
+
+    @pytest.fixture(scope="session")
+    def wavelength_range(
+        request: FixtureRequest[tuple[float, float] | None],
+    ) -> tuple[float, float] | None:
+        return request.param
 
-    @pytest.mark.parametrize("wavelength_range", [None, (0.0, 1.0)])
-    @pytest.mark.parametrize("time_offset", ["auto", 1.0])
-    @pytest.mark.parametrize("intensity_offset", ["auto", 1.0])
+    @pytest.fixture(scope="session")
+    def aggregated_along_wavelength(
+        session_data: trpl.TRPLData, wavelength_range: tuple[float, float] | None
+    ) -> pd.DataFrame:
+        data = session_data
+        if wavelength_range is None:
+            wavelength_range = data.wavelength.min(), data.wavelength.max()
+        columns = (wavelength_range[0] <= data.wavelength_axis) & (
+            data.wavelength_axis <= wavelength_range[1]
+        )
+        return pd.DataFrame(
+            dict(
+                time=data.time_axis,
+                intensity=data.intensity_2d[:, columns].sum(axis=1, dtype=np.int32),
+            )
+        ).iloc[: len(data.time_axis) if columns.any() else 0]
+
+    @pytest.mark.parametrize("wavelength_range", [None, (0.0, 1.0)], indirect=True)
     def test_aggregate_along_wavelength_with_wavelength_range(
         data: trpl.TRPLData,
         wavelength_range: tuple[float, float] | None,
-        time_offset: t.Literal["auto"] | float,
-        intensity_offset: t.Literal["auto"] | float,
-        mocker: pytest_mock.MockerFixture,
+        aggregated_along_wavelength: pd.DataFrame,
+        find_scdc_mock: pytest_mock.MockType,
     ) -> None:
-        find_scdc_mock = mocker.patch(
-            "tlab_analysis.utils.find_scdc", return_value=(0.0, 0.0)
-        )
-        actual = data.aggregate_along_wavelength(
-            wavelength_range, time_offset, intensity_offset
+        offsets: list[t.Literal["auto"] | float] = ["auto", 1.0]
+        for time_offset, intensity_offset in itertools.product(offsets, offsets):
+            actual = data.aggregate_along_wavelength(
+                wavelength_range, time_offset, intensity_offset
+            )
+            if time_offset == "auto":
+                time_offset = float(find_scdc_mock.return_value[0])
+            if intensity_offset == "auto":
+                intensity_offset = float(find_scdc_mock.return_value[1])
+            expected = aggregated_along_wavelength.assign(
+                time=aggregated_along_wavelength["time"] - time_offset,
+                intensity=aggregated_along_wavelength["intensity"] - intensity_offset,
+            )
+            assert actual.attrs["wavelength_range"] == (
+                wavelength_range or (data.wavelength.min(), data.wavelength.max())
+            )
+            assert actual.attrs["time_offset"] == time_offset
+            assert actual.attrs["intensity_offset"] == intensity_offset
+            assert_frame_values_equal(actual, expected)
+
+    @pytest.mark.parametrize(
+        ("dtype", "expected"),
+        [(np.uint16, np.int32), (np.uint32, np.int64), (np.float64, np.float64)],
+    )
+    def test_aggregate_accumulator_dtype(
+        data: trpl.TRPLData, dtype: type, expected: type
+    ) -> None:
+        data = dataclasses.replace(data, intensity_2d=data.intensity_2d.astype(dtype))
+        assert data.aggregate_along_time()["intensity"].dtype == expected
+        assert (
+            data.aggregate_along_wavelength(time_offset=0, intensity_offset=0)[
+                "intensity"
+            ].dtype
+            == expected
         )
-        if wavelength_range is None:
-            wavelength_range = data.wavelength.min(), data.wavelength.max()
-        if time_offset == "auto":
-            time_offset = float(find_scdc_mock.return_value[0])
-        if intensity_offset == "auto":
-            intensity_offset = float(find_scdc_mock.return_value[1])
-        expected = (
-            data.df[data.wavelength.between(*wavelength_range)]
-            .groupby("time")
-            .sum()
-            .drop("wavelength", axis=1)
-            .sort_values("time")
-            .reset_index()
+
+    def test_aggregate_does_not_share_memory(data: trpl.TRPLData) -> None:
+        by_time = data.aggregate_along_time()
+        by_wavelength = data.aggregate_along_wavelength(
+            time_offset=0, intensity_offset=0
         )
-        expected["time"] -= time_offset
-        expected["intensity"] -= intensity_offset
-        assert actual.attrs["wavelength_range"] == wavelength_range
-        assert actual.attrs["time_offset"] == time_offset
-        assert actual.attrs["intensity_offset"] == intensity_offset
-        pd.testing.assert_frame_equal(actual, expected)
+        for df in (by_time, by_wavelength):
+            for column in df.columns:
+                for array in (data.time_axis, data.wavelength_axis, data.intensity_2d):
+                    assert not np.shares_memory(df[column].to_numpy(), array)
+
+    def test_aggregate_along_wavelength_computes_scdc_once_per_range(
+        data: trpl.TRPLData, find_scdc_mock: pytest_mock.MockType
+    ) -> None:
+        data.aggregate_along_wavelength()
+        data.aggregate_along_wavelength(time_offset=1.0)
+        assert find_scdc_mock.call_count == 1
+        data.aggregate_along_wavelength((300.0, 400.0))
+        assert find_scdc_mock.call_count == 2
@@ -1,7 +1,8 @@
 import numpy as np
 import pandas as pd
 import pytest
-from scipy import optimize
+import pytest_mock
+from scipy import interpolate, optimize
 
 from tlab_analysis import utils
 
@@ -40,6 +41,30 @@ def test_smooth_when_window_is_float(window: float) -> None:
     )
 
 
+@pytest.mark.parametrize("window", [2, 4, 100, 150])
+def test_smooth_when_window_is_even_or_large(window: int) -> None:
+    x = np.random.default_rng(0).random(100)
+    smoothed = utils.smooth(x, window)
+    np.testing.assert_allclose(
+        smoothed,
+        pd.Series(x).rolling(window, center=True, min_periods=1).mean().to_list(),
+    )
+
+
+def test_smooth_when_x_has_nan() -> None:
+    x = [1.0, 2.0, np.nan, 4.0, 5.0, np.nan, np.nan, np.nan, 9.0]
+    smoothed = utils.smooth(x, 3)
+    np.testing.assert_array_equal(
+        smoothed,
+        pd.Series(x).rolling(3, center=True, min_periods=1).mean().to_list(),
+    )
+    assert utils.smooth([1, 2, np.nan, 4, 5], 3) == [1.5, 1.5, 3.0, 4.5, 4.5]
+
+
+def test_smooth_when_x_is_empty() -> None:
+    assert utils.smooth([]) == []
+
+
 @pytest.mark.parametrize("window", [-0.3, -3])
 def test_smooth_when_window_is_negative(window: int | float) -> None:
     x = list(range(100))
@@ -60,6 +85,27 @@ def describe_peak() -> None:
         assert peak.width == peak.x1 - peak.x0
 
 
+def test_smoothing_spline_is_shared(mocker: pytest_mock.MockerFixture) -> None:
+    utils._eval_smoothing_spline_cached.cache_clear()
+    spy = mocker.spy(interpolate, "make_smoothing_spline")
+    x = np.linspace(-1.0, 1.0, 200)
+    y = np.exp(-(x**2) / 0.02)
+    utils.find_peaks(x, y)
+    utils.curve_fit(lambda x, a: a * np.exp(-(x**2) / 0.02), x.tolist(), y.tolist())
+    assert spy.call_count == 1
+
+
+def test_smoothing_spline_is_not_cached_for_large_data(
+    mocker: pytest_mock.MockerFixture,
+) -> None:
+    utils._eval_smoothing_spline_cached.cache_clear()
+    mocker.patch.object(utils, "_SPLINE_CACHE_MAX_SIZE", 100)
+    x = np.linspace(-1.0, 1.0, 200)
+    y = np.exp(-(x**2) / 0.02)
+    utils.find_peaks(x, y)
+    assert utils._eval_smoothing_spline_cached.cache_info().currsize == 0
+
+
 @pytest.mark.parametrize("mu", [-0.5, 0.1, 0.5])
 @pytest.mark.parametrize("sigma", [0.1, 0.2, 0.3])
 @pytest.mark.parametrize("y_max", [1.0, 3.0, 5.0])
@@ -127,6 +173,17 @@ def test_find_scdc(x0: float, y0: float, tau: float, seed: int) -> None:
     assert y_err < eps, f"y_err is too large: {y_err:.6g}"
 
 
+@pytest.mark.parametrize(
+    "y",
+    [[0.0] * 40, [10.0] + [0.0] * 29 + [1.0] + [0.0] * 9],
+    ids=["no_signal", "no_start_point"],
+)
+def test_find_scdc_not_found(y: list[float]) -> None:
+    x = np.arange(len(y), dtype=np.float64)
+    with pytest.raises(ValueError):
+        utils.find_scdc(x, y)
+
+
 @pytest.mark.skip("deprecated on version 0.6.0")
 @pytest.mark.parametrize("x0", [0.1, 0.2])
 @pytest.mark.parametrize("tau", [0.1, 0.2, 0.3, 0.4])